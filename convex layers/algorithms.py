@@ -1,5 +1,8 @@
 import numpy as np
 
+from convex_layers import cross
+from input_handler import InputHandler
+
 class StaticConvexHullAlgorithms:
     def __init__(self):
         # initialize the convex hull algorithms class
@@ -10,10 +13,6 @@ class StaticConvexHullAlgorithms:
         # sort points by x, then y
         pts = np.array(sorted(points, key=lambda p: (p[0], p[1])))
 
-        # define cross product function
-        def cross(o, a, b):
-            return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
-
         # build lower hull
         lower = []
         for p in pts:
@@ -119,12 +118,17 @@ class StaticConvexHullAlgorithms:
         # merge step
         return merge_hulls(left_hull, right_hull)
 
-    def compute_convex_layers(self, points, method='graham'):
+    def compute_convex_layers(self, points, method='graham', max_layers=None, chunk_size=None):
         # compute convex layers by iteratively removing hull points
+        # with chunk_size, points (an array, memmap or file path) are streamed and only
+        # the outer max_layers layers are computed
+        if chunk_size is not None:
+            return self.compute_outer_layers_chunked(points, max_layers, chunk_size, method)
+
         points = list(map(tuple, points))  # ensure points are tuples
         layers = []
 
-        while len(points) >= 3:
+        while len(points) >= 3 and (max_layers is None or len(layers) < max_layers):
             if method == 'graham':
                 hull = self.graham_scan(points)
             elif method == 'jarvis':
@@ -135,6 +139,43 @@ class StaticConvexHullAlgorithms:
                 raise ValueError("Unknown method. Use 'graham', 'jarvis', or 'divide'")
 
             layers.append(hull)
-            points = [p for p in points if tuple(p) not in hull]
+            hull_set = set(map(tuple, np.asarray(hull).tolist()))
+            points = [p for p in points if tuple(p) not in hull_set]
+
+        return layers
+
+    def compute_outer_layers_chunked(self, points, k, chunk_size=100000, method='graham'):
+        # out-of-core outer layers: a point deeper than k in one chunk is deeper than k
+        # in the union, so the outer k layers of the union are contained in the outer k
+        # layers of the chunks and only those candidates are carried between chunks.
+        # The containment needs orientation tests that agree on every subset of the points;
+        # cross() decides near-collinear triples exactly, with plain float tests nearly
+        # collinear input gave different hulls for a chunk than for the full set
+        if k is None:
+            raise ValueError("Chunked computation needs max_layers, all layers require all points")
+        if k < 1:
+            raise ValueError(f"max_layers must be at least 1, got {k}")
+
+        if isinstance(points, str):
+            chunks = InputHandler().iter_chunks(points, chunk_size)
+        else:
+            chunks = (points[i:i + chunk_size] for i in range(0, len(points), chunk_size))
+
+        candidates = []
+        layers = []
+        for chunk in chunks:
+            merged = candidates + [tuple(p) for p in np.asarray(chunk).tolist()]
+            layers = self.compute_convex_layers(merged, method=method, max_layers=k)
+            kept = set(map(tuple, np.vstack(layers).tolist())) if layers else set()
+            if len(layers) < k or len(set(map(tuple, np.asarray(layers[-1]).tolist()))) < 3:
+                # fewer than k layers means every point is on one of them or left over; a
+                # collinear last layer leaves only points on its segment, and they decide
+                # whether that layer still has three points when the candidates are peeled
+                candidates = merged
+            else:
+                # every point removed by the first k peels, duplicates of vertices included
+                candidates = [p for p in merged if p in kept]
 
+        # the last merged set contains the outer k layers of the union, so its layers are
+        # the result; peeling the reduced candidates again could only add rounding drift
         return layers
@@ -1,7 +1,5 @@
 # animation.py
-import turtle
 import time
-import multiprocessing
 
 class TurtleAnimation:
     def __init__(self, dynamic_layers, width=800, height=600, margin=50):
@@ -99,6 +97,8 @@ class TurtleAnimation:
 
     @staticmethod
     def _animate(steps, width, height, margin):
+        # turtle pulls in tkinter, so it is only loaded inside the animation process
+        import turtle
 
         try:
             # Initialize Turtle screen
@@ -162,6 +162,7 @@ class TurtleAnimation:
             return
 
         # Start the separate process for animation
+        import multiprocessing
         self.process = multiprocessing.Process(target=self._animate, args=(steps, self.width, self.height, self.margin))
         self.process.start()
 
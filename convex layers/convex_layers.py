@@ -1,30 +1,84 @@
 # dynamic_convex_layers.py
 import numpy as np
 import time
+import tracemalloc
+from collections import deque
+
+from layer_result import LayerResult
+
+# relative rounding error bound of the float cross product (a little above 3 ulp)
+CROSS_ERROR_BOUND = 1e-15
 
 
 def cross(o, a, b):
-    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+    # callers only use the sign: > 0 for a left turn, 0 when collinear
+    left = (a[0] - o[0]) * (b[1] - o[1])
+    right = (a[1] - o[1]) * (b[0] - o[0])
+    det = left - right
+    if abs(det) > CROSS_ERROR_BOUND * (abs(left) + abs(right)):
+        return det
+    # too close to call in floating point: decide exactly, so nearly collinear points get
+    # the same orientation whichever subset of the points the hull is built from
+    return _exact_cross(o, a, b)
+
+
+def _exact_cross(o, a, b):
+    # every float is an integer over a power of two, so scaling all six coordinates to the
+    # largest denominator turns the cross product into exact integer arithmetic
+    try:
+        (on, od), (pn, pd) = o[0].as_integer_ratio(), o[1].as_integer_ratio()
+        (an, ad), (qn, qd) = a[0].as_integer_ratio(), a[1].as_integer_ratio()
+        (bn, bd), (rn, rd) = b[0].as_integer_ratio(), b[1].as_integer_ratio()
+    except AttributeError:
+        # numpy integer scalars have no as_integer_ratio, python ints and floats do
+        return _exact_cross(*[[int(x) if isinstance(x, np.integer) else float(x) for x in p[:2]] for p in (o, a, b)])
+    scale = max(od, pd, ad, qd, bd, rd)
+    ox, oy = on * (scale // od), pn * (scale // pd)
+    ax, ay = an * (scale // ad), qn * (scale // qd)
+    bx, by = bn * (scale // bd), rn * (scale // rd)
+    return (ax - ox) * (by - oy) - (ay - oy) * (bx - ox)
+
+
+# points read per batch when the lean mode walks its index arrays
+LEAN_CHUNK_SIZE = 1 << 16
 
 
 class DynamicConvexLayers:
-    def __init__(self, algorithm="graham"):
+    def __init__(self, algorithm="graham", lean=False, dtype=np.float64, track_memory=False):
+        # lean mode keeps the points in one preallocated buffer (float64, float32 or int32)
+        # and peels through index arrays without copying the coordinates
+        self.lean = lean
+        # tracemalloc makes the peeling loop several times slower, so peak memory is opt-in
+        self.track_memory = track_memory
+        self.dtype = np.dtype(dtype)
+        self._buffer = np.empty((0, 2), dtype=self.dtype)
+        self._size = 0
         self.points = np.empty((0, 2))
         self.layers = []
+        self.result = LayerResult.empty()
         self.steps = []
         self.algorithm = algorithm
         self.peeled_layers = []
         self.last_runtime = 0
         self.last_layer_count = 0
+        self.last_peak_memory = 0
 
     def set_algorithm(self, algo):
         self.algorithm = algo
 
     def initialize(self, points):
-        self.points = np.array(points)
+        if self.lean:
+            self._size = 0
+            self._append(points)
+        else:
+            self.points = np.array(points)
         self.compute_layers()
 
     def compute_layers(self):
+        if self.lean:
+            self._compute_layers_lean()
+            return
+
         start = time.time()
         self.layers = []
         self.steps = []
@@ -50,6 +104,10 @@ class DynamicConvexLayers:
 
             self.steps.append(step)
 
+        # pack into one contiguous result, self.layers keeps views into it
+        self.result = LayerResult.from_layers(self.layers, self.points)
+        self.layers = self.result.layers()
+
         end = time.time()
         self.last_runtime = end - start
         self.last_layer_count = len(self.layers)
@@ -103,6 +161,10 @@ class DynamicConvexLayers:
         return np.array(hull)
 
     def peel_one_layer(self):
+        if self.lean:
+            self._peel_one_layer_lean()
+            return
+
         if self.layers:
             top_layer = self.layers.pop()
             self.peeled_layers.append(top_layer)
@@ -113,22 +175,41 @@ class DynamicConvexLayers:
     def re_add_layer(self):
         if self.peeled_layers:
             layer = self.peeled_layers.pop()
+            if self.lean:
+                self._append(layer)
+                self.compute_layers()
+                return
             self.points = np.vstack([self.points, layer])
             self.compute_layers()
 
     def add_point(self, point):
+        if self.lean:
+            self._append([point])
+            self.compute_layers()
+            return
         self.points = np.vstack([self.points, point])
         self.compute_layers()
 
     def remove_point(self, point):
+        if self.lean:
+            # compare in the buffer's dtype, a float64 0.1 never equals the stored float32 0.1
+            point = np.asarray(point, dtype=self.dtype)
         idx = np.where((self.points == point).all(axis=1))
         if len(idx[0]) > 0:
-            self.points = np.delete(self.points, idx[0][0], axis=0)
+            if self.lean:
+                # move the last point into the freed slot instead of shifting the buffer
+                self._buffer[idx[0][0]] = self._buffer[self._size - 1]
+                self._resize(self._size - 1)
+            else:
+                self.points = np.delete(self.points, idx[0][0], axis=0)
             self.compute_layers()
 
     def get_layers(self):
         return self.layers
 
+    def get_result(self):
+        return self.result
+
     def get_computation_steps(self):
         return self.steps
 
@@ -137,3 +218,275 @@ class DynamicConvexLayers:
 
     def get_performance_info(self):
         return self.last_runtime, self.last_layer_count
+
+    def get_memory_info(self):
+        # peak bytes allocated during the last lean compute_layers (with track_memory), plus the point buffer
+        return self.last_peak_memory, self._buffer.nbytes
+
+    # lean mode
+
+    def _resize(self, size):
+        self._size = size
+        self.points = self._buffer[:size]
+
+    def _append(self, points):
+        points = np.asarray(points).reshape(-1, 2)
+        needed = self._size + len(points)
+        if needed > len(self._buffer):
+            # grow geometrically so repeated add_point calls stay amortized O(1)
+            buffer = np.empty((max(needed, 2 * len(self._buffer)), 2), dtype=self.dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        self._buffer[self._size:needed] = points
+        self._resize(needed)
+
+    def _compute_layers_lean(self):
+        start = time.time()
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self.track_memory:
+            tracemalloc.reset_peak()
+
+        points = self.points
+        n = len(points)
+        index_dtype = np.int32 if n < 2 ** 31 else np.int64
+        xs, ys = points[:, 0], points[:, 1]
+
+        # sort once, removing hull points keeps the remaining indices sorted by (x, y)
+        remaining = np.lexsort((ys, xs)).astype(index_dtype, copy=False)
+        point_layer = np.full(n, -1, dtype=index_dtype)
+        hulls = self._peel_indices(xs, ys, remaining, point_layer)
+
+        offsets = np.zeros(len(hulls) + 1, dtype=np.int64)
+        np.cumsum([len(hull) for hull in hulls], out=offsets[1:])
+        order = np.concatenate(hulls) if hulls else np.empty(0, dtype=index_dtype)
+        self.result = LayerResult(points[order], offsets, point_layer)
+        self.layers = self.result.layers()
+        # per-layer snapshots of the remaining points would cost O(n * layers) memory
+        self.steps = []
+
+        if self.track_memory:
+            self.last_peak_memory = tracemalloc.get_traced_memory()[1]
+        if tracing:
+            tracemalloc.stop()
+        self.last_runtime = time.time() - start
+        self.last_layer_count = len(self.layers)
+
+    @staticmethod
+    def _peel_indices(xs, ys, remaining, point_layer, first_layer=0):
+        # peel the (x, y)-sorted indices into hulls of indices, writing each point's layer into point_layer
+        hulls = []
+        layer = first_layer
+        while len(remaining) > 0:
+            hull, removed = DynamicConvexLayers._peel_layer(xs, ys, remaining)
+            hulls.append(hull)
+            point_layer[remaining[removed]] = layer
+            remaining = remaining[~removed]
+            layer += 1
+        return hulls
+
+    @staticmethod
+    def _peel_layer(xs, ys, remaining):
+        # hull indices of the outermost layer and a mask of the positions it removes
+        if len(remaining) >= 3:
+            hull_pos = DynamicConvexLayers._monotone_chain_positions(xs, ys, remaining)
+        else:
+            # all remaining points form the last layer
+            hull_pos = np.arange(len(remaining))
+        return remaining[hull_pos], DynamicConvexLayers._mark_duplicates(xs, ys, remaining, hull_pos)
+
+    @staticmethod
+    def _iter_coords(xs, ys, remaining, reverse=False):
+        # yield (x, y, position) in remaining order, gathering one chunk at a time
+        starts = range(0, len(remaining), LEAN_CHUNK_SIZE)
+        for begin in (reversed(starts) if reverse else starts):
+            idx = remaining[begin:begin + LEAN_CHUNK_SIZE]
+            chunk = zip(xs[idx].tolist(), ys[idx].tolist(), range(begin, begin + len(idx)))
+            yield from (reversed(list(chunk)) if reverse else chunk)
+
+    @staticmethod
+    def _monotone_chain_positions(xs, ys, remaining):
+        # same hull as graham_scan, but returns positions into remaining
+        lower = []
+        for p in DynamicConvexLayers._iter_coords(xs, ys, remaining):
+            while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+                lower.pop()
+            lower.append(p)
+        upper = []
+        for p in DynamicConvexLayers._iter_coords(xs, ys, remaining, reverse=True):
+            while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+                upper.pop()
+            upper.append(p)
+        return np.array([p[2] for p in lower[:-1] + upper[:-1]], dtype=np.int64)
+
+    @staticmethod
+    def _mark_duplicates(xs, ys, remaining, hull_pos):
+        # hull points plus every point with the same coordinates, which are adjacent in sorted order
+        removed = np.zeros(len(remaining), dtype=bool)
+        removed[hull_pos] = True
+        for pos in hull_pos:
+            i = remaining[pos]
+            for step in (-1, 1):
+                j = pos + step
+                while 0 <= j < len(remaining) and not removed[j] \
+                        and xs[remaining[j]] == xs[i] and ys[remaining[j]] == ys[i]:
+                    removed[j] = True
+                    j += step
+        return removed
+
+    def _peel_one_layer_lean(self):
+        if self.layers:
+            # drop the points of the last layer by compacting the buffer in place
+            last = len(self.layers) - 1
+            self.peeled_layers.append(self.layers.pop().copy())
+            keep = np.flatnonzero(self.result.point_layer != last)
+            self._buffer[:len(keep)] = self._buffer[keep]
+            self._resize(len(keep))
+            self.compute_layers()
+
+
+class SlidingWindowConvexLayers:
+    # convex layers of the most recent points of a stream, bounded by a window size,
+    # a time horizon, or both. A push repeels from the outermost layer the new or evicted
+    # points touch and stops once the inner layers are unchanged, but a change to an outer
+    # layer cascades inward, so a push is still O(n * L) like a full recompute. In practice
+    # it is about 2x cheaper than compute_layers on the same window for scattered points
+    # and barely cheaper on nearly collinear ones, where every layer shifts.
+    def __init__(self, window_size=None, horizon=None, dtype=np.float64):
+        if window_size is None and horizon is None:
+            raise ValueError("Give a window_size, a horizon, or both")
+        if window_size is not None and window_size < 1:
+            raise ValueError(f"window_size must be at least 1, got {window_size}")
+        if horizon is not None and horizon <= 0:
+            raise ValueError(f"horizon must be positive, got {horizon}")
+        self.window_size = window_size
+        self.horizon = horizon
+
+        # points live in slots; freed slots are reused so nothing is shifted on eviction
+        capacity = window_size + 1 if window_size is not None else 1024
+        self._points = np.empty((capacity, 2), dtype=dtype)
+        self._times = np.empty(capacity)
+        self._depth = np.zeros(capacity, dtype=np.int64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._order = deque()  # slots from oldest to newest
+
+        self.layers = []
+        self.last_runtime = 0
+        self.last_repeeled = 0
+
+    def push(self, point, timestamp=None):
+        # add a point, evict what falls out of the window and return the new point's depth
+        start = time.time()
+        if timestamp is None:
+            timestamp = time.time()
+
+        dirty = len(self.layers)
+        deepest = -1
+        while self._order and (
+                (self.window_size is not None and len(self._order) >= self.window_size)
+                or (self.horizon is not None and self._times[self._order[0]] < timestamp - self.horizon)):
+            depth = self._evict()
+            dirty, deepest = min(dirty, depth), max(deepest, depth)
+
+        # layers outside the new point are not changed by it
+        dirty = min(dirty, self._locate(point))
+        slot = self._insert(point, timestamp)
+        self._repeel(dirty, slot, deepest)
+
+        self.last_runtime = time.time() - start
+        return int(self._depth[slot])
+
+    def stream(self, points, timestamps=None):
+        # generator of the depth of every incoming point
+        if timestamps is None:
+            for point in points:
+                yield self.push(point)
+        else:
+            for point, timestamp in zip(points, timestamps):
+                yield self.push(point, timestamp)
+
+    def _evict(self):
+        slot = self._order.popleft()
+        self._valid[slot] = False
+        self._free.append(slot)
+        # removing a point only changes its own layer and the ones inside it
+        return int(self._depth[slot])
+
+    def _insert(self, point, timestamp):
+        if not self._free:
+            # time-horizon windows have no fixed size, so the slots grow geometrically
+            capacity = len(self._points)
+            self._points = np.concatenate([self._points, np.empty_like(self._points)])
+            self._times = np.concatenate([self._times, np.empty(capacity)])
+            self._depth = np.concatenate([self._depth, np.zeros(capacity, dtype=np.int64)])
+            self._valid = np.concatenate([self._valid, np.zeros(capacity, dtype=bool)])
+            self._free = list(range(2 * capacity - 1, capacity - 1, -1))
+
+        slot = self._free.pop()
+        self._points[slot] = point
+        self._times[slot] = timestamp
+        self._depth[slot] = len(self.layers)
+        self._valid[slot] = True
+        self._order.append(slot)
+        return slot
+
+    def _locate(self, point):
+        # first layer the point could change: the point is not strictly inside it or the
+        # layer is degenerate. Returning too small a layer is safe, it only repeels more.
+        x, y = float(point[0]), float(point[1])
+        for j, layer in enumerate(self.layers):
+            if len(layer) < 3:
+                return j
+            vx, vy = layer[:, 0].astype(float), layer[:, 1].astype(float)
+            nx, ny = np.roll(vx, -1), np.roll(vy, -1)
+            # hull vertices are counter-clockwise, inside means left of every edge
+            left, right = (nx - vx) * (y - vy), (ny - vy) * (x - vx)
+            det, bound = left - right, CROSS_ERROR_BOUND * (np.abs(left) + np.abs(right))
+            if (det < -bound).any():
+                return j
+            # turns within the rounding error bound are decided exactly, like the peel does
+            vertices = layer.tolist()
+            for k in np.flatnonzero(np.abs(det) <= bound):
+                if _exact_cross(vertices[k], vertices[(k + 1) % len(vertices)], point) <= 0:
+                    return j
+        return len(self.layers)
+
+    def _repeel(self, first_layer, new_slot, deepest_evicted):
+        # recompute the layers from first_layer inward, the outer ones are unchanged
+        indices = np.flatnonzero(self._valid & (self._depth >= first_layer))
+        xs, ys = self._points[:, 0], self._points[:, 1]
+        remaining = indices[np.lexsort((ys[indices], xs[indices]))]
+        old_depth = self._depth[remaining]
+        old_depth[remaining == new_slot] = -1  # the new point was on no layer before
+
+        layers = self.layers[:first_layer]
+        layer = first_layer
+        deepest_peeled = deepest_evicted
+        self.last_repeeled = 0
+        while len(remaining) > 0:
+            hull, removed = DynamicConvexLayers._peel_layer(xs, ys, remaining)
+            self._depth[remaining[removed]] = layer
+            layers.append(self._points[hull])
+            self.last_repeeled += len(remaining)
+            deepest_peeled = max(deepest_peeled, int(old_depth[removed].max()))
+            remaining, old_depth = remaining[~removed], old_depth[~removed]
+
+            # once exactly the points that used to be on layers up to this one (minus the
+            # evicted ones, plus the new one) are peeled, the inner layers are the old ones
+            if deepest_peeled <= layer and (old_depth > layer).all():
+                layers.extend(self.layers[layer + 1:])
+                break
+            layer += 1
+        self.layers = layers
+
+    def get_layers(self):
+        return self.layers
+
+    def get_window_points(self):
+        return self._points[list(self._order)]
+
+    def get_depths(self):
+        # depth of every window point, oldest first
+        return self._depth[list(self._order)]
@@ -0,0 +1,354 @@
+# differential_harness.py
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from algorithms import StaticConvexHullAlgorithms
+from convex_layers import DynamicConvexLayers, SlidingWindowConvexLayers, cross
+from layer_result import LayerResult
+
+# layers compared for the chunked engine, which only computes the outer ones
+CHUNKED_LAYERS = 3
+
+
+def _dynamic_layers(points, **kwargs):
+    layers = DynamicConvexLayers(**kwargs)
+    layers.initialize(points)
+    return layers.get_layers()
+
+
+def _sliding_window_layers(points):
+    window = SlidingWindowConvexLayers(window_size=len(points))
+    for _ in window.stream(points):
+        pass
+    return window.get_layers()
+
+
+# hull backends return one hull, layer engines return a list of layers
+HULL_BACKENDS = {
+    "static_graham": lambda points: StaticConvexHullAlgorithms().graham_scan(points),
+    "static_jarvis": lambda points: StaticConvexHullAlgorithms().jarvis_march(points),
+    "static_divide": lambda points: StaticConvexHullAlgorithms().divide_and_conquer_hull(list(map(tuple, points))),
+    "dynamic_graham": lambda points: DynamicConvexLayers().graham_scan(points),
+    "dynamic_andrew": lambda points: DynamicConvexLayers().andrew_monotone_chain(points),
+    "dynamic_jarvis": lambda points: DynamicConvexLayers().jarvis_march(points),
+}
+
+LAYER_BACKENDS = {
+    "static_layers_graham": lambda points: StaticConvexHullAlgorithms().compute_convex_layers(points, method='graham'),
+    "static_layers_jarvis": lambda points: StaticConvexHullAlgorithms().compute_convex_layers(points, method='jarvis'),
+    "static_layers_divide": lambda points: StaticConvexHullAlgorithms().compute_convex_layers(points, method='divide'),
+    "static_layers_chunked": lambda points: StaticConvexHullAlgorithms().compute_convex_layers(
+        points, max_layers=CHUNKED_LAYERS, chunk_size=max(3, len(points) // 4)),
+    "dynamic_layers_graham": lambda points: _dynamic_layers(points, algorithm="graham"),
+    "dynamic_layers_andrew": lambda points: _dynamic_layers(points, algorithm="andrew"),
+    "dynamic_layers_jarvis": lambda points: _dynamic_layers(points, algorithm="jarvis"),
+    "dynamic_layers_lean": lambda points: _dynamic_layers(points, lean=True),
+    "sliding_window": _sliding_window_layers,
+}
+
+HULL_REFERENCE = "dynamic_graham"
+LAYER_REFERENCE = "dynamic_layers_graham"
+
+DEFAULT_BACKENDS = list(HULL_BACKENDS) + list(LAYER_BACKENDS)
+
+# known defects of the existing backends on the default cases, keyed by (backend, case);
+# they are reported separately so that a clean tree passes and a new mismatch stands out
+KNOWN_FAILURES = {
+    ("static_jarvis", "nearly_collinear"): "keeps points that rounding puts off the hull edges",
+    ("static_layers_jarvis", "random_integer"): "static jarvis keeps collinear boundary points on the layer",
+    ("static_layers_jarvis", "collinear"): "static jarvis keeps collinear boundary points on the layer",
+    ("static_layers_jarvis", "nearly_collinear"): "gift wrapping loops forever on inconsistent orientations",
+    ("static_layers_jarvis", "grid"): "static jarvis keeps collinear boundary points on the layer",
+    ("static_layers_jarvis", "collinear_inner_layer"): "static jarvis keeps collinear boundary points on the layer",
+}
+
+
+def generate_cases(n=200, seed=0):
+    # randomized and degenerate inputs, all as float arrays of shape (n, 2)
+    rng = np.random.default_rng(seed)
+    t = rng.random(n)
+    k = rng.integers(0, 100, n).astype(float)
+    angles = np.sort(rng.random(n)) * 2 * np.pi
+    side = int(np.sqrt(n))
+    return {
+        "random": rng.random((n, 2)) * 100,
+        "random_integer": rng.integers(0, 20, (n, 2)).astype(float),
+        "duplicates": np.repeat(rng.random((n // 4, 2)) * 100, 4, axis=0),
+        "collinear": np.c_[k, 2 * k + 3],
+        "nearly_collinear": np.c_[t * 100, t * 50 + 3],
+        "grid": np.array([(x, y) for x in range(side) for y in range(side)], dtype=float),
+        "huge_coordinates": rng.random((n, 2)) * 1e6 + 1e15,
+        "circle": np.c_[np.cos(angles), np.sin(angles)] * 1e3,
+        "triangle": np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]]),
+        # the inner layer is a segment that only exists because of the point in its middle
+        "collinear_inner_layer": np.array([[0, 0], [10, 0], [10, 10], [0, 10], [1, 5], [5, 5], [9, 5]], dtype=float),
+    }
+
+
+# divide_and_conquer_hull never terminates, so both divide backends time out on every case
+KNOWN_FAILURES.update({(name, case): "divide_and_conquer_hull never terminates"
+                       for name in ("static_divide", "static_layers_divide") for case in generate_cases()})
+
+
+def canonical_hull(hull):
+    # sorted distinct vertices, without points lying on an edge between their neighbours,
+    # so backends that keep collinear boundary points compare equal to those that do not
+    ring = []
+    for p in map(tuple, np.asarray(hull, dtype=float).reshape(-1, 2).tolist()):
+        if not ring or ring[-1] != p:
+            ring.append(p)
+    while len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if len(ring) >= 3:
+        strict = [p for i, p in enumerate(ring) if cross(ring[i - 1], p, ring[(i + 1) % len(ring)]) != 0]
+        # a hull of collinear points reduces to the two ends of the segment
+        ring = strict if len(strict) >= 3 else [min(ring), max(ring)]
+    return sorted(set(ring))
+
+
+def canonical_layers(layers):
+    # sorted distinct vertices per layer
+    return [sorted(set(map(tuple, np.asarray(layer, dtype=float).reshape(-1, 2).tolist()))) for layer in layers]
+
+
+def drop_leftover(layers, points):
+    # the static engine stops once fewer than three points remain instead of reporting
+    # them as a last layer; the last layer holds every point equal to one of its vertices
+    if layers:
+        last = set(layers[-1])
+        if sum(1 for p in map(tuple, np.asarray(points, dtype=float).tolist()) if p in last) < 3:
+            return layers[:-1]
+    return layers
+
+
+def _run_backend(name, points, repeats, budget, conn):
+    # runs in a separate process so a hanging backend can be terminated
+    try:
+        func = HULL_BACKENDS.get(name) or LAYER_BACKENDS[name]
+        best, spent = float("inf"), 0.0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = func(points)
+            elapsed = time.perf_counter() - start
+            best, spent = min(best, elapsed), spent + elapsed
+            # a slow backend gets fewer timing runs instead of running out of time
+            if spent + elapsed > budget:
+                break
+
+        if name in HULL_BACKENDS:
+            output = canonical_hull(output)
+        else:
+            output = canonical_layers(output)
+        conn.send(("ok", output, best))
+    except Exception as e:
+        conn.send(("error", repr(e), None))
+    finally:
+        conn.close()
+
+
+class DifferentialHarness:
+    def __init__(self, cases=None, timeout=5.0, repeats=3):
+        self.cases = cases if cases is not None else generate_cases()
+        self.timeout = timeout
+        self.repeats = repeats
+        self.outputs = {}
+        self.timings = {}
+        self.failures = []
+        self.expected_failures = []
+        self.unexpected_passes = []
+
+    def run_backend(self, name, points):
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_run_backend,
+                                          args=(name, points, self.repeats, self.timeout * self.repeats, child_conn))
+        process.start()
+        child_conn.close()
+
+        if parent_conn.poll(self.timeout * self.repeats):
+            try:
+                result = parent_conn.recv()
+            except EOFError:
+                result = ("error", "backend process exited without a result", None)
+        else:
+            result = ("timeout", f"no result after {self.timeout * self.repeats:.1f}s", None)
+        process.terminate()
+        process.join()
+        return result
+
+    def run(self, backends=None):
+        # run every backend on every case and compare against the reference of its kind
+        names = backends or DEFAULT_BACKENDS
+        self.outputs, self.timings, self.failures = {}, {}, []
+        self.expected_failures, self.unexpected_passes = [], []
+
+        for case, points in self.cases.items():
+            for name in names:
+                status, output, seconds = self.run_backend(name, points)
+                if status != "ok":
+                    self.record_failure(name, case, f"{status}: {output}")
+                    continue
+                self.outputs[(name, case)] = output
+                self.timings.setdefault(name, {})[case] = seconds
+
+            for name in names:
+                reference = HULL_REFERENCE if name in HULL_BACKENDS else LAYER_REFERENCE
+                if name == reference or (name, case) not in self.outputs:
+                    continue
+                if (reference, case) not in self.outputs:
+                    self.record_failure(name, case, f"reference {reference} has no result")
+                    continue
+                expected = self.outputs[(reference, case)]
+                actual = self.outputs[(name, case)]
+                if name.startswith("static_layers"):
+                    expected = drop_leftover(expected, points)
+                if name == "static_layers_chunked":
+                    expected = expected[:CHUNKED_LAYERS]
+                if actual != expected:
+                    self.record_failure(name, case, self.describe_mismatch(expected, actual, name in HULL_BACKENDS))
+                elif (name, case) in KNOWN_FAILURES:
+                    self.unexpected_passes.append((name, case))
+
+        return self.failures
+
+    def check_sliding_window(self):
+        # a window smaller than the input, so points are evicted; after every push the layers
+        # and depths must match a full recompute of the points left in the window
+        for case, points in self.cases.items():
+            window = SlidingWindowConvexLayers(window_size=max(2, len(points) // 4))
+            for step, depth in enumerate(window.stream(points)):
+                reference = DynamicConvexLayers(lean=True)
+                reference.initialize(window.get_window_points())
+                expected_depths = reference.get_result().point_layer
+                detail = None
+                if canonical_layers(window.get_layers()) != canonical_layers(reference.get_layers()):
+                    detail = self.describe_mismatch(canonical_layers(reference.get_layers()),
+                                                    canonical_layers(window.get_layers()), False)
+                elif not np.array_equal(window.get_depths(), expected_depths):
+                    detail = "depths of the window points differ"
+                elif depth != expected_depths[-1]:
+                    detail = f"new point has depth {depth}, expected {expected_depths[-1]}"
+                if detail:
+                    self.record_failure("sliding_window_eviction", case, f"step {step}: {detail}")
+                    break
+        return self.failures
+
+    def check_serialization(self):
+        # every LayerResult save/load path must give back the same arrays in the same dtypes
+        for case, points in self.cases.items():
+            dtypes = [np.float64, np.float32]
+            if np.array_equal(points, np.round(points)) and np.abs(points).max() < 2 ** 31:
+                dtypes.append(np.int32)
+            for dtype in dtypes:
+                layers = DynamicConvexLayers(lean=True, dtype=dtype)
+                layers.initialize(points)
+                result = layers.get_result()
+                for name, loaded in self.round_trips(result):
+                    detail = self.compare_results(result, loaded)
+                    if detail:
+                        self.record_failure(f"layer_result_{name}", case, f"{np.dtype(dtype).name}: {detail}")
+        return self.failures
+
+    @staticmethod
+    def round_trips(result):
+        with tempfile.TemporaryDirectory() as directory:
+            result.save(os.path.join(directory, "layers.npz"))
+            yield "npz", LayerResult.load(os.path.join(directory, "layers.npz"))
+            result.save(os.path.join(directory, "layers"))
+            yield "npy", LayerResult.load(os.path.join(directory, "layers"))
+            yield "mmap", LayerResult.load(os.path.join(directory, "layers"), mmap=True)
+            result.save_raw(os.path.join(directory, "layers.bin"))
+            yield "raw", LayerResult.load_raw(os.path.join(directory, "layers.bin"))
+            yield "buffer", LayerResult.from_buffer(result.to_bytes())
+
+    @staticmethod
+    def compare_results(expected, actual):
+        for field in ("vertices", "offsets", "point_layer"):
+            a, b = getattr(expected, field), getattr(actual, field)
+            if a.dtype != b.dtype:
+                return f"{field} dtype {b.dtype}, expected {a.dtype}"
+            if not np.array_equal(a, b):
+                return f"{field} differs"
+        return None
+
+    def record_failure(self, name, case, detail):
+        if (name, case) in KNOWN_FAILURES:
+            self.expected_failures.append((name, case, detail))
+        else:
+            self.failures.append((name, case, detail))
+
+    @staticmethod
+    def describe_mismatch(expected, actual, is_hull):
+        if is_hull:
+            return f"hull has {len(actual)} vertices, expected {len(expected)}"
+        if len(actual) != len(expected):
+            return f"{len(actual)} layers, expected {len(expected)}"
+        first = next(i for i, (a, b) in enumerate(zip(actual, expected)) if a != b)
+        return f"layer {first + 1} differs ({len(actual[first])} vs {len(expected[first])} vertices)"
+
+    def save_baseline(self, path):
+        with open(path, "w") as file:
+            json.dump(self.timings, file, indent=2, sort_keys=True)
+
+    def compare_baseline(self, path, tolerance=1.5, min_seconds=1e-3):
+        # backends/cases that got slower than tolerance times the recorded baseline;
+        # runs faster than min_seconds are too noisy to compare
+        with open(path, "r") as file:
+            baseline = json.load(file)
+
+        regressions = []
+        for name, cases in self.timings.items():
+            for case, seconds in cases.items():
+                previous = baseline.get(name, {}).get(case)
+                if previous is None or max(seconds, previous) < min_seconds:
+                    continue
+                if seconds > tolerance * previous:
+                    regressions.append((name, case, previous, seconds))
+        return regressions
+
+    def print_report(self):
+        for name, cases in self.timings.items():
+            total = sum(cases.values())
+            print(f"{name:<24} {total:.4f}s over {len(cases)} cases")
+        for name, case, detail in self.expected_failures:
+            print(f"KNOWN {name} on {case}: {detail} ({KNOWN_FAILURES[(name, case)]})")
+        for name, case in self.unexpected_passes:
+            print(f"FIXED {name} on {case}: remove it from KNOWN_FAILURES")
+        if not self.failures:
+            print("All backends agree on all cases apart from known failures")
+        for name, case, detail in self.failures:
+            print(f"FAIL {name} on {case}: {detail}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare all hull backends and layer engines")
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--record", help="write timing baseline to this file")
+    parser.add_argument("--check", help="compare timings against this baseline file")
+    parser.add_argument("--backends", nargs="+", choices=list(HULL_BACKENDS) + list(LAYER_BACKENDS),
+                        help="backends to run, by default all of them")
+    args = parser.parse_args()
+
+    harness = DifferentialHarness(generate_cases(args.size, args.seed), timeout=args.timeout)
+    harness.run(args.backends)
+    harness.check_sliding_window()
+    harness.check_serialization()
+    harness.print_report()
+
+    regressions = []
+    if args.record:
+        harness.save_baseline(args.record)
+    if args.check:
+        regressions = harness.compare_baseline(args.check)
+        for name, case, previous, seconds in regressions:
+            print(f"SLOWER {name} on {case}: {previous:.4f}s -> {seconds:.4f}s")
+
+    sys.exit(1 if harness.failures or regressions else 0)
@@ -1,6 +1,8 @@
 # input_handler.py
 import random
 
+import numpy as np
+
 class InputHandler:
 
 
@@ -22,3 +24,24 @@ class InputHandler:
         except Exception as e:
             print(f"Error reading file: {e}")
             return []
+
+    def iter_chunks(self, filepath, chunk_size=100000):
+        # stream points from a file in chunks of at most chunk_size points
+        # .npy files of shape (n, 2) are memory-mapped, anything else is read as the text format above
+        if filepath.endswith('.npy'):
+            points = np.load(filepath, mmap_mode='r')
+            for start in range(0, len(points), chunk_size):
+                yield np.asarray(points[start:start + chunk_size])
+            return
+
+        with open(filepath, 'r') as file:
+            chunk = []
+            for line in file:
+                parts = line.strip().split()
+                if len(parts) == 2:
+                    chunk.append((float(parts[0]), float(parts[1])))
+                    if len(chunk) == chunk_size:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
@@ -0,0 +1,139 @@
+# layer_result.py
+import os
+import numpy as np
+
+# raw buffer header: magic, dtype codes, number of vertices, number of layers, number of
+# points; 32 bytes, so every array after it starts 8-byte aligned
+RAW_MAGIC = b"CVXL"
+RAW_HEADER = np.dtype([("magic", "S4"), ("dtypes", "<i4"), ("n_vertices", "<i8"), ("n_layers", "<i8"),
+                       ("n_points", "<i8")])
+# the low byte of the dtypes field selects the vertex dtype, the next byte the point layer
+# dtype; code 0 is the 64-bit type, so headers written with a zero field still read back
+RAW_VERTEX_DTYPES = [np.dtype("<f8"), np.dtype("<f4"), np.dtype("<i4"), np.dtype("<i8")]
+RAW_INDEX_DTYPES = [np.dtype("<i8"), np.dtype("<i4")]
+
+
+class LayerResult:
+    # compact convex layers: all hull vertices in one contiguous array in layer order,
+    # CSR-style offsets into it, and the layer index of every input point
+    def __init__(self, vertices, offsets, point_layer):
+        self.vertices = vertices
+        self.offsets = offsets
+        self.point_layer = point_layer
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_layers(cls, layers, points=None):
+        # pack a list of per-layer arrays into the compact format
+        layers = [np.asarray(layer).reshape(-1, 2) for layer in layers]
+        if not layers:
+            result = cls.empty()
+        else:
+            vertices = np.ascontiguousarray(np.concatenate(layers))
+            offsets = np.zeros(len(layers) + 1, dtype=np.int64)
+            np.cumsum([len(layer) for layer in layers], out=offsets[1:])
+            result = cls(vertices, offsets, np.empty(0, dtype=np.int64))
+
+        if points is not None:
+            result.point_layer = result.assign_points(points)
+        return result
+
+    def assign_points(self, points):
+        # layer index of each point, -1 for points that are not a hull vertex
+        depth = {}
+        for i in range(self.layer_count()):
+            for p in self.layer(i):
+                depth.setdefault(tuple(p), i)
+        return np.array([depth.get(tuple(p), -1) for p in points], dtype=np.int64)
+
+    def layer_count(self):
+        return len(self.offsets) - 1
+
+    def layer(self, i):
+        # view into the shared vertex array, no copy
+        return self.vertices[self.offsets[i]:self.offsets[i + 1]]
+
+    def layers(self):
+        return [self.layer(i) for i in range(self.layer_count())]
+
+    def __len__(self):
+        return self.layer_count()
+
+    def __iter__(self):
+        for i in range(self.layer_count()):
+            yield self.layer(i)
+
+    def save(self, path):
+        # uncompressed .npz, or a directory of .npy files that can be memory-mapped
+        if str(path).endswith(".npz"):
+            np.savez(path, vertices=self.vertices, offsets=self.offsets, point_layer=self.point_layer)
+        else:
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, "vertices.npy"), self.vertices)
+            np.save(os.path.join(path, "offsets.npy"), self.offsets)
+            np.save(os.path.join(path, "point_layer.npy"), self.point_layer)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        if str(path).endswith(".npz"):
+            # npz members cannot be memory-mapped, they are read fully
+            with np.load(path) as data:
+                return cls(data["vertices"], data["offsets"], data["point_layer"])
+
+        mode = "r" if mmap else None
+        return cls(np.load(os.path.join(path, "vertices.npy"), mmap_mode=mode),
+                   np.load(os.path.join(path, "offsets.npy"), mmap_mode=mode),
+                   np.load(os.path.join(path, "point_layer.npy"), mmap_mode=mode))
+
+    def to_bytes(self):
+        # header followed by the three arrays, for sending between processes; vertices and
+        # point layers keep their dtype (lean float32/int32 results stay half the size)
+        vertex_dtype = self._raw_dtype(self.vertices, RAW_VERTEX_DTYPES)
+        index_dtype = self._raw_dtype(self.point_layer, RAW_INDEX_DTYPES)
+        dtypes = RAW_VERTEX_DTYPES.index(vertex_dtype) | RAW_INDEX_DTYPES.index(index_dtype) << 8
+        header = np.array([(RAW_MAGIC, dtypes, len(self.vertices), self.layer_count(), len(self.point_layer))],
+                          dtype=RAW_HEADER)
+        return b"".join([header.tobytes(),
+                         np.ascontiguousarray(self.vertices, dtype=vertex_dtype).tobytes(),
+                         np.ascontiguousarray(self.offsets, dtype="<i8").tobytes(),
+                         np.ascontiguousarray(self.point_layer, dtype=index_dtype).tobytes()])
+
+    @staticmethod
+    def _raw_dtype(array, supported):
+        # the little-endian form of the array's dtype, or the 64-bit default if unsupported
+        dtype = np.dtype(array.dtype).newbyteorder("<")
+        return dtype if dtype in supported else supported[0]
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        # zero-copy: the arrays are read-only views over the given buffer
+        header = np.frombuffer(buffer, dtype=RAW_HEADER, count=1)[0]
+        if header["magic"] != RAW_MAGIC:
+            raise ValueError("Buffer does not contain convex layers data")
+
+        n_vertices, n_layers, n_points = int(header["n_vertices"]), int(header["n_layers"]), int(header["n_points"])
+        dtypes = int(header["dtypes"])
+        vertex_code, index_code = dtypes & 0xFF, dtypes >> 8 & 0xFF
+        if vertex_code >= len(RAW_VERTEX_DTYPES) or index_code >= len(RAW_INDEX_DTYPES):
+            raise ValueError(f"Unknown dtype codes in convex layers header: {dtypes:#x}")
+
+        offset = RAW_HEADER.itemsize
+        vertices = np.frombuffer(buffer, dtype=RAW_VERTEX_DTYPES[vertex_code], count=2 * n_vertices,
+                                 offset=offset).reshape(-1, 2)
+        offset += vertices.nbytes
+        offsets = np.frombuffer(buffer, dtype="<i8", count=n_layers + 1, offset=offset)
+        offset += offsets.nbytes
+        point_layer = np.frombuffer(buffer, dtype=RAW_INDEX_DTYPES[index_code], count=n_points, offset=offset)
+        return cls(vertices, offsets, point_layer)
+
+    def save_raw(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load_raw(cls, path):
+        # memory-map a file written with to_bytes()
+        return cls.from_buffer(np.memmap(path, dtype=np.uint8, mode="r"))
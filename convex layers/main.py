@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from input_handler import InputHandler
 from convex_layers import DynamicConvexLayers
@@ -188,6 +187,9 @@ class ConvexLayersGUI:
 
     def display_visualization(self):
         # display the current static visualization (matplotlib) on the GUI
+        # the Tk backend is imported here so the window appears before matplotlib loads
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         if self.canvas:
             self.canvas.get_tk_widget().destroy()
 
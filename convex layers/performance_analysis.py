@@ -1,6 +1,13 @@
+import argparse
+import os
+import subprocess
+import sys
 import time
 import numpy as np
-import matplotlib.pyplot as plt
+
+# modules that only the GUI/plotting side is allowed to load
+HEAVY_MODULES = ("matplotlib", "tkinter", "turtle", "multiprocessing")
+CORE_MODULES = ("convex_layers", "algorithms", "input_handler")
 
 class PerformanceAnalysis:
     def __init__(self, dynamic_layers, static_algos):
@@ -23,3 +30,74 @@ class PerformanceAnalysis:
         print(f"Static Algorithm Time (Graham): {static_time:.4f}s")
 
         # Extend this to plot runtime for varying input sizes, etc.
+
+    @staticmethod
+    def measure_import_time(modules=CORE_MODULES, repeats=5):
+        # import the modules in a fresh interpreter, like a spawned worker does,
+        # and report the best wall time plus any heavy modules that came along
+        best = float("inf")
+        heavy = []
+        for _ in range(repeats):
+            elapsed, heavy = PerformanceAnalysis._import_sample(modules)
+            best = min(best, elapsed)
+        return best, heavy
+
+    @staticmethod
+    def _import_sample(modules):
+        script = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"for name in {tuple(modules)!r}:\n"
+            "    __import__(name)\n"
+            "elapsed = time.perf_counter() - start\n"
+            f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+            "print(elapsed)\n"
+            "print(','.join(heavy))\n"
+        )
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        out = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True,
+                             text=True, check=True).stdout.splitlines()
+        heavy = [m for m in out[1].split(",") if m] if len(out) > 1 else []
+        return float(out[0]), heavy
+
+    def check_import_time(self, modules=CORE_MODULES, repeats=7, tolerance=1.5, margin=0.05):
+        # guard: the compute core must never load plotting/GUI backends (hard failure), and
+        # its import time must stay within tolerance * numpy's plus margin; numpy dominates
+        # and varies per machine, so both are sampled interleaved and compared by median
+        core_times, numpy_times, heavy = [], [], set()
+        for _ in range(repeats):
+            numpy_times.append(self._import_sample(("numpy",))[0])
+            elapsed, loaded = self._import_sample(modules)
+            core_times.append(elapsed)
+            heavy.update(loaded)
+
+        if heavy:
+            raise RuntimeError(f"Core modules loaded heavy dependencies: {', '.join(sorted(heavy))}")
+
+        elapsed, baseline = float(np.median(core_times)), float(np.median(numpy_times))
+        limit = tolerance * baseline + margin
+        print(f"Import Time ({', '.join(modules)}): {elapsed:.4f}s, numpy alone {baseline:.4f}s (limit {limit:.4f}s)")
+        if elapsed > limit:
+            raise RuntimeError(f"Import time {elapsed:.4f}s exceeds limit of {limit:.4f}s")
+        return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convex layers performance checks")
+    parser.add_argument("--imports", action="store_true", help="only check the import time of the compute core")
+    parser.add_argument("--points", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        if args.imports:
+            PerformanceAnalysis(None, None).check_import_time()
+        else:
+            from algorithms import StaticConvexHullAlgorithms
+            from convex_layers import DynamicConvexLayers
+            from input_handler import InputHandler
+
+            analysis = PerformanceAnalysis(DynamicConvexLayers(), StaticConvexHullAlgorithms())
+            analysis.run_tests(InputHandler().generate_random_points(n=args.points))
+    except RuntimeError as e:
+        print(f"FAIL {e}")
+        sys.exit(1)
@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 import numpy as np
 
 
@@ -8,6 +6,9 @@ class Visualization:
         self.dynamic_layers = dynamic_layers
 
     def get_static_plot(self):
+        # matplotlib is only loaded the first time a plot is requested
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots()
         points = self.dynamic_layers.get_all_points()  # Retrieve all points
         layers = self.dynamic_layers.get_layers()  # Retrieve each convex layer
@@ -25,6 +26,9 @@ class Visualization:
         return fig
 
     def get_animation_plot(self):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+
         fig, ax = plt.subplots()
         steps = self.dynamic_layers.get_computation_steps()
 